@@ -0,0 +1,69 @@
+"""
+Helpers shared by the extraction, formatting and import scripts
+
+Standard library only, so that any script can import it without pulling in the others.
+"""
+
+# Number of rows transformed and written at once
+CHUNK_SIZE = 50000
+
+# Read buffer for input files (default 8 KB means one read syscall every ~100 lines)
+READ_BUFFER_SIZE = 1 << 20
+
+# IDFA returned by iOS when ad tracking is not authorized (raw and already formatted)
+ZERO_IDFAS = frozenset({'00000000-0000-0000-0000-000000000000', '0' * 32})
+
+# Hex prefixes encoding the IDFA length in combination keys
+HEX_LENGTHS = [f'{i:02x}' for i in range(256)]
+
+
+def combination_key(idfa, idfv):
+    """
+    Build a compact key identifying an IDFA/IDFV combination
+
+    Hex identifiers are packed into bytes (16 bytes per UUID instead of a 36-char
+    string), prefixed with the IDFA length so that the split between both
+    identifiers is unambiguous. Case and dashes are ignored, like in Tenjin format.
+    Other identifiers are kept as a (idfa, idfv) tuple.
+
+    Args:
+        idfa: IDFA (iOS) or GAID (Android), may be empty
+        idfv: IDFV (iOS) or Android ID (Android), may be empty
+
+    Returns:
+        bytes or tuple: Key for duplicate detection
+    """
+    hex_idfa = idfa.replace('-', '')
+    hex_digits = hex_idfa + idfv.replace('-', '')
+    # bytes.fromhex skips whitespace: only pack plain hex digits (fromhex rejects
+    # any other character, so excluding whitespace is enough)
+    if hex_digits and not hex_digits.isalnum():
+        return (idfa, idfv)
+    try:
+        return bytes.fromhex(HEX_LENGTHS[len(hex_idfa)] + hex_digits)
+    except (IndexError, ValueError):
+        return (idfa, idfv)
+
+
+def write_rows(outfile, writer, rows):
+    """
+    Write two-column rows at once, as preformatted lines when possible
+
+    Identifiers never need CSV quoting in practice, and joining the lines directly
+    is several times faster than csv.writer. If any field contains a delimiter,
+    quote or line break, the rows are written with csv.writer instead.
+
+    Args:
+        outfile: Output file object
+        writer: csv.writer on outfile (default dialect)
+        rows: List of (first, second) string pairs
+    """
+    text = ''.join([f'{first},{second}\r\n' for first, second in rows])
+    count = len(rows)
+
+    # Same bytes as csv.writer when no field needs quoting
+    if (text.count(',') == count and text.count('\n') == count
+            and text.count('\r') == count and '"' not in text):
+        outfile.write(text)
+    else:
+        writer.writerows(rows)
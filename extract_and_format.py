@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Script to extract attribution identifiers from RevenueCat Customers CSV file
+and format them for Tenjin API in a single pass
+
+Equivalent to running extract_idfa_idfv_customers.py then format_for_tenjin.py,
+without writing and re-reading the intermediate CSV file.
+
+Note: Both identifiers (advertising_id + developer_device_id) are sent simultaneously to Tenjin
+for each user, enabling better attribution even if one identifier is missing.
+"""
+
+import csv
+import sys
+from contextlib import nullcontext
+
+from tqdm import tqdm
+
+from common import CHUNK_SIZE, READ_BUFFER_SIZE, ZERO_IDFAS, combination_key, write_rows
+from extract_idfa_idfv_customers import CombinationFilter, column_indices, iter_csv_rows, read_header
+
+
+def extract_and_format(source_csv, tenjin_csv, skip_zero_idfa=True, raw_file=None):
+    """
+    Extract unique IDFA/IDFV combinations from Customers CSV file and write them in Tenjin format
+
+    Duplicates are detected on the formatted identifiers, so combinations only
+    differing by case or dashes are sent once. Seen combinations are kept as
+    packed keys (see combination_key) to bound memory on large exports.
+
+    Args:
+        source_csv: Path to RevenueCat Customers CSV file
+        tenjin_csv: Output CSV file formatted for Tenjin
+        skip_zero_idfa: If True, ignore lines with zero IDFA (default: True)
+        raw_file: Optional CSV file also receiving the raw idfa,idfv combinations, as written by
+                  extract_idfa_idfv_customers.py (zero IDFAs included, duplicates on raw values)
+    """
+    seen = set()
+    # Raw combinations have their own duplicate detection, before any filtering
+    raw_filter = CombinationFilter() if raw_file else None
+    # New combinations waiting to be written, by chunks of CHUNK_SIZE
+    pending = []
+    pending_raw = []
+
+    total_rows = 0
+    rows_with_data = 0
+    skipped_zero_idfa = 0
+
+    print(f"Reading file {source_csv}...")
+
+    with open(source_csv, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as infile, \
+         open(tenjin_csv, 'w', encoding='utf-8', newline='') as outfile, \
+         (open(raw_file, 'w', encoding='utf-8', newline='') if raw_file else nullcontext()) as rawfile:
+
+        i_idfa, i_idfv = column_indices(read_header(infile, delimiter=';'), source_csv)
+        # Columns after idfa/idfv are not needed: don't split them
+        reader = iter_csv_rows(infile, delimiter=';', maxsplit=max(i_idfa, i_idfv) + 1)
+        min_length = max(i_idfa, i_idfv) + 1
+
+        writer = csv.writer(outfile)
+        writer.writerow(['advertising_id', 'developer_device_id'])
+
+        raw_writer = csv.writer(rawfile) if rawfile else None
+        if raw_writer:
+            raw_writer.writerow(['idfa', 'idfv'])
+
+        for row in tqdm(reader, unit='row', mininterval=0.1):
+            # Skip blank lines
+            if not row:
+                continue
+
+            total_rows += 1
+
+            # Ignore truncated lines
+            if len(row) < min_length:
+                continue
+
+            idfa = row[i_idfa].strip()
+            idfv = row[i_idfv].strip()
+
+            if not idfa and not idfv:
+                continue
+            rows_with_data += 1
+
+            if raw_filter and raw_filter.add(idfa, idfv):
+                pending_raw.append((idfa, idfv))
+                if len(pending_raw) >= CHUNK_SIZE:
+                    write_rows(rawfile, raw_writer, pending_raw)
+                    pending_raw.clear()
+
+            # Check if IDFA is zero
+            if skip_zero_idfa and idfa in ZERO_IDFAS:
+                skipped_zero_idfa += 1
+                continue
+
+            # Format UUIDs for Tenjin (lowercase, without dashes)
+            formatted = (idfa.replace('-', '').lower(), idfv.replace('-', '').lower())
+            key = combination_key(*formatted)
+
+            # Write each combination the first time it is seen
+            if key not in seen:
+                seen.add(key)
+                pending.append(formatted)
+
+                if len(pending) >= CHUNK_SIZE:
+                    write_rows(outfile, writer, pending)
+                    pending.clear()
+
+        write_rows(outfile, writer, pending)
+        if raw_writer:
+            write_rows(rawfile, raw_writer, pending_raw)
+
+    print(f"\n✓ Extraction and formatting complete!")
+    print(f"  - Total lines read: {total_rows}")
+    print(f"  - Lines with IDFA/IDFV: {rows_with_data}")
+    if skip_zero_idfa:
+        print(f"  - Zero IDFAs ignored: {skipped_zero_idfa}")
+    print(f"  - Unique combinations: {len(seen)}")
+    print(f"\nOutput file: {tenjin_csv}")
+    if raw_file:
+        print(f"Raw combinations file: {raw_file}")
+
+
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Extract IDFA/IDFV from a RevenueCat Customers export and format them '
+                    'for Tenjin Import Attribution API in one pass'
+    )
+    parser.add_argument(
+        'input_file',
+        nargs='?',
+        default='idfv_not_null.csv',
+        help='Input RevenueCat Customers CSV file (default: idfv_not_null.csv)'
+    )
+    parser.add_argument(
+        'output_file',
+        nargs='?',
+        default='tenjin_formatted.csv',
+        help='Output CSV file (default: tenjin_formatted.csv)'
+    )
+    parser.add_argument(
+        '--keep-zero-idfa',
+        action='store_true',
+        help='Keep zero IDFAs (default: ignore them)'
+    )
+    parser.add_argument(
+        '--also-write-raw',
+        metavar='RAW_FILE',
+        help='Also write the raw idfa,idfv combinations to this CSV file'
+    )
+
+    args = parser.parse_args()
+
+    try:
+        extract_and_format(
+            args.input_file,
+            args.output_file,
+            skip_zero_idfa=not args.keep_zero_idfa,
+            raw_file=args.also_write_raw
+        )
+    except FileNotFoundError:
+        print(f"Error: The file '{args.input_file}' does not exist.")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error: {e}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
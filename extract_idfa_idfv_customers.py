@@ -7,88 +7,335 @@ Note: Both identifiers are then sent simultaneously to Tenjin for each user.
 """
 
 import csv
+import mmap
+import multiprocessing
 import sys
-from collections import OrderedDict
+from functools import partial
+from itertools import chain, islice
 
+from tqdm import tqdm
 
-def extract_idfa_idfv_customers(csv_file, output_file):
+from common import CHUNK_SIZE, READ_BUFFER_SIZE, combination_key, write_rows
+
+# Number of byte ranges scanned by each process in --jobs mode
+RANGES_PER_JOB = 4
+
+
+def iter_csv_rows(f, delimiter=';', maxsplit=-1):
     """
-    Extract unique attribution identifier combinations from Customers CSV file
-    Supports iOS (IDFA/IDFV) and Android (GAID/Android ID)
+    Iterate over CSV rows, splitting unquoted lines with str.split
+
+    Most lines of a RevenueCat export have no quotes: splitting them directly is
+    much faster than the generic csv tokenizer. Quoted records (possibly spanning
+    several lines) are still parsed by the csv module.
 
     Args:
-        csv_file: Path to input CSV file
-        output_file: Path to output CSV file
+        f: File object opened in text mode
+        delimiter: Field delimiter
+        maxsplit: Maximum number of splits on unquoted lines, like str.split (-1 = all).
+                  Only fields before the last split are reliable.
+
+    Yields:
+        list: Fields of each row ([] for blank lines, like csv.reader)
     """
-    # Use OrderedDict to keep order and avoid duplicates
-    combinations = OrderedDict()
+    lines = iter(f)
 
-    total_rows = 0
-    rows_with_data = 0
+    for line in lines:
+        if '"' not in line:
+            line = line.rstrip('\r\n')
+            yield line.split(delimiter, maxsplit) if line else []
+        else:
+            # The csv reader pulls the next lines itself when a quoted field spans several lines
+            yield next(csv.reader(chain([line], lines), delimiter=delimiter, quotechar='"'))
+
+
+def column_indices(header, csv_file):
+    """
+    Locate idfa/idfv columns in the header row
+
+    Args:
+        header: Header row (list of column names)
+        csv_file: Path to input CSV file (for error messages)
+
+    Returns:
+        tuple: (idfa index, idfv index)
+    """
+    if 'idfa' not in header or 'idfv' not in header:
+        raise ValueError(f"Columns 'idfa' and 'idfv' are required in {csv_file}")
+    return header.index('idfa'), header.index('idfv')
+
+
+def read_header(f, delimiter=';'):
+    """
+    Read the header row of a CSV file
+
+    Args:
+        f: File object opened in text mode, positioned at the start of the file
+        delimiter: Field delimiter
+
+    Returns:
+        list: Column names
+    """
+    return next(iter_csv_rows([f.readline()], delimiter=delimiter), [])
 
-    print(f"Reading file {csv_file}...")
 
-    with open(csv_file, 'r', encoding='utf-8') as f:
-        # Use semicolon delimiter and handle quotes
-        reader = csv.DictReader(f, delimiter=';', quotechar='"')
+class CombinationFilter:
+    """Detect unique IDFA/IDFV combinations and count processed lines"""
 
-        for row in reader:
-            total_rows += 1
+    def __init__(self):
+        # Only compact keys are kept: combinations are written as soon as they are found
+        self.seen = set()
+        self.total_rows = 0
+        self.rows_with_data = 0
 
-            # Display progress every 50000 records (larger file)
-            if total_rows % 50000 == 0:
-                print(f"Processed {total_rows} lines, found {len(combinations)} unique combinations...")
+    def add(self, idfa, idfv):
+        """
+        Register a combination
+
+        Returns:
+            bool: True if the combination was not seen before
+        """
+        key = combination_key(idfa, idfv)
+        if key in self.seen:
+            return False
+        self.seen.add(key)
+        return True
+
+    def scan(self, rows, i_idfa, i_idfv):
+        """
+        Iterate over new IDFA/IDFV combinations of parsed rows, in file order
+
+        Args:
+            rows: Iterable of rows (lists of fields), without header
+            i_idfa: Index of the idfa column
+            i_idfv: Index of the idfv column
+
+        Yields:
+            tuple: (idfa, idfv) the first time each combination is seen
+        """
+        min_length = max(i_idfa, i_idfv) + 1
+
+        for row in rows:
+            # Skip blank lines
+            if not row:
+                continue
+
+            self.total_rows += 1
+
+            # Ignore truncated lines
+            if len(row) < min_length:
+                continue
 
             # Get IDFA and IDFV directly from columns
-            idfa = row.get('idfa', '').strip()
-            idfv = row.get('idfv', '').strip()
+            idfa = row[i_idfa].strip()
+            idfv = row[i_idfv].strip()
 
             # If at least one exists, add it
             if idfa or idfv:
-                rows_with_data += 1
-                # Use tuple as key to avoid duplicates
-                key = (idfa, idfv)
-                combinations[key] = True
+                self.rows_with_data += 1
+                if self.add(idfa, idfv):
+                    yield idfa, idfv
 
-    print(f"\nProcessing complete:")
-    print(f"  - Total lines: {total_rows}")
-    print(f"  - Lines with IDFA/IDFV: {rows_with_data}")
-    print(f"  - Unique combinations: {len(combinations)}")
 
-    # Write results to output file
-    print(f"\nWriting results to {output_file}...")
+def iter_mmap_lines(mm, start, end):
+    """
+    Iterate over decoded lines of a memory-mapped file between two byte offsets
+
+    Args:
+        mm: mmap object
+        start: Start offset (beginning of a line)
+        end: End offset (beginning of a line, or end of file)
+
+    Yields:
+        str: Lines, including their line ending
+    """
+    mm.seek(start)
+    while mm.tell() < end:
+        yield mm.readline().decode('utf-8')
+
+
+def scan_byte_range(csv_file, byte_range, i_idfa, i_idfv):
+    """
+    Worker: collect unique combinations from a byte range of the input file
+
+    Args:
+        csv_file: Path to input CSV file
+        byte_range: (start, end) offsets, both at the beginning of a line (or end of file)
+        i_idfa: Index of the idfa column
+        i_idfv: Index of the idfv column
+
+    Returns:
+        tuple: (combinations: list of new (idfa, idfv) in the range, total_rows: int, rows_with_data: int)
+    """
+    start, end = byte_range
+    combination_filter = CombinationFilter()
+
+    with open(csv_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        # Columns after idfa/idfv are not needed: don't split them
+        rows = iter_csv_rows(iter_mmap_lines(mm, start, end), delimiter=';',
+                             maxsplit=max(i_idfa, i_idfv) + 1)
+        combinations = list(combination_filter.scan(rows, i_idfa, i_idfv))
+
+    return combinations, combination_filter.total_rows, combination_filter.rows_with_data
 
-    with open(output_file, 'w', encoding='utf-8', newline='') as f:
-        writer = csv.writer(f)
+
+def split_byte_ranges(mm, data_start, parts):
+    """
+    Split a memory-mapped file into byte ranges aligned on line boundaries
+
+    Args:
+        mm: mmap object
+        data_start: Offset of the first data line (after header)
+        parts: Number of ranges wanted
+
+    Returns:
+        list: (start, end) offsets
+    """
+    size = len(mm)
+    step = max((size - data_start) // parts, 1)
+    bounds = [data_start]
+
+    for i in range(1, parts):
+        newline = mm.find(b'\n', data_start + i * step)
+        if newline == -1:
+            break
+        if newline + 1 > bounds[-1]:
+            bounds.append(newline + 1)
+
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if start < end]
+
+
+def write_combinations(out, writer, combinations):
+    """
+    Write combinations by chunks of CHUNK_SIZE rows
+
+    Args:
+        out: Output file object
+        writer: csv.writer on out
+        combinations: Iterable of (idfa, idfv)
+    """
+    combinations = iter(combinations)
+    for chunk in iter(lambda: list(islice(combinations, CHUNK_SIZE)), []):
+        write_rows(out, writer, chunk)
+
+
+def write_combinations_parallel(csv_file, out, writer, combination_filter, jobs):
+    """
+    Find unique combinations using several processes, each scanning a byte range
+
+    Note: lines are split on raw newlines, so quoted fields spanning several lines
+    are not supported in this mode.
+
+    Args:
+        csv_file: Path to input CSV file
+        out: Output file object
+        writer: csv.writer on out
+        combination_filter: CombinationFilter updated with the results
+        jobs: Number of worker processes
+    """
+    with open(csv_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        header_line = mm.readline()
+        header = next(iter_csv_rows([header_line.decode('utf-8')], delimiter=';'), [])
+        i_idfa, i_idfv = column_indices(header, csv_file)
+        # Several ranges per process: partial results are smaller and written as they arrive
+        ranges = split_byte_ranges(mm, len(header_line), jobs * RANGES_PER_JOB)
+
+    print(f"Scanning {len(ranges)} ranges with {jobs} processes...")
+
+    with multiprocessing.Pool(jobs) as pool:
+        partials = pool.imap(partial(scan_byte_range, csv_file, i_idfa=i_idfa, i_idfv=i_idfv), ranges)
+
+        # Merge partial results in file order to keep first-seen order
+        for combinations, total_rows, rows_with_data in tqdm(partials, total=len(ranges), unit='range'):
+            combination_filter.total_rows += total_rows
+            combination_filter.rows_with_data += rows_with_data
+            write_combinations(out, writer, (
+                (idfa, idfv) for idfa, idfv in combinations if combination_filter.add(idfa, idfv)
+            ))
+
+
+def extract_idfa_idfv_customers(csv_file, output_file, jobs=1):
+    """
+    Extract unique attribution identifier combinations from Customers CSV file
+    Supports iOS (IDFA/IDFV) and Android (GAID/Android ID)
+
+    Args:
+        csv_file: Path to input CSV file
+        output_file: Path to output CSV file
+        jobs: Number of worker processes (1 = sequential read)
+    """
+    combination_filter = CombinationFilter()
+
+    print(f"Reading file {csv_file}...")
+    print(f"Writing results to {output_file}...")
+
+    with open(output_file, 'w', encoding='utf-8', newline='') as out:
+        writer = csv.writer(out)
 
         # Write header
         writer.writerow(['idfa', 'idfv'])
 
-        # Write all combinations
-        for (idfa, idfv) in combinations.keys():
-            writer.writerow([idfa, idfv])
+        # Write each combination as soon as it is found
+        if jobs > 1:
+            write_combinations_parallel(csv_file, out, writer, combination_filter, jobs)
+        else:
+            with open(csv_file, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as f:
+                # Locate idfa/idfv columns once instead of building a dict per row
+                i_idfa, i_idfv = column_indices(read_header(f, delimiter=';'), csv_file)
 
-    print(f"✓ Extraction complete! {len(combinations)} combinations exported.")
+                # Use semicolon delimiter and handle quotes, columns after idfa/idfv are not split
+                reader = iter_csv_rows(f, delimiter=';', maxsplit=max(i_idfa, i_idfv) + 1)
 
+                rows = tqdm(reader, unit='row', mininterval=0.1)
+                write_combinations(out, writer, combination_filter.scan(rows, i_idfa, i_idfv))
 
-if __name__ == '__main__':
-    # Input file
-    input_file = 'idfv_not_null.csv'
+    print(f"\nProcessing complete:")
+    print(f"  - Total lines: {combination_filter.total_rows}")
+    print(f"  - Lines with IDFA/IDFV: {combination_filter.rows_with_data}")
+    print(f"  - Unique combinations: {len(combination_filter.seen)}")
+
+    print(f"✓ Extraction complete! {len(combination_filter.seen)} combinations exported.")
 
-    # Output file
-    output_file = 'idfa_idfv_customers.csv'
 
-    # Allow passing arguments via command line
-    if len(sys.argv) > 1:
-        input_file = sys.argv[1]
-    if len(sys.argv) > 2:
-        output_file = sys.argv[2]
+def main():
+    """Main entry point"""
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description='Extract IDFA/IDFV combinations from a RevenueCat Customers export'
+    )
+    parser.add_argument(
+        'input_file',
+        nargs='?',
+        default='idfv_not_null.csv',
+        help='Input RevenueCat Customers CSV file (default: idfv_not_null.csv)'
+    )
+    parser.add_argument(
+        'output_file',
+        nargs='?',
+        default='idfa_idfv_customers.csv',
+        help='Output CSV file (default: idfa_idfv_customers.csv)'
+    )
+    parser.add_argument(
+        '--jobs',
+        type=int,
+        default=1,
+        help='Number of worker processes scanning the file in parallel (default: 1). '
+             'Not supported with quoted fields spanning several lines.'
+    )
+
+    args = parser.parse_args()
 
     try:
-        extract_idfa_idfv_customers(input_file, output_file)
+        extract_idfa_idfv_customers(args.input_file, args.output_file, jobs=args.jobs)
     except FileNotFoundError:
-        print(f"Error: The file '{input_file}' does not exist.")
+        print(f"Error: The file '{args.input_file}' does not exist.")
         sys.exit(1)
     except Exception as e:
         print(f"Error: {e}")
         sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -9,23 +9,11 @@ for each user, enabling better attribution even if one identifier is missing.
 
 import csv
 import sys
+from itertools import islice
 
+from tqdm import tqdm
 
-def format_uuid_for_tenjin(uuid_str):
-    """
-    Convert UUID to Tenjin format (lowercase, without dashes)
-
-    Args:
-        uuid_str: UUID in standard format (ex: F024E65F-3DD9-4F16-9837-26BCEF192D68)
-
-    Returns:
-        UUID formatted for Tenjin (ex: f024e65f3dd94f16983726bcef192d68)
-    """
-    if not uuid_str:
-        return ""
-
-    # Remove dashes and convert to lowercase
-    return uuid_str.replace("-", "").lower()
+from common import CHUNK_SIZE, READ_BUFFER_SIZE, ZERO_IDFAS, write_rows
 
 
 def format_csv_for_tenjin(input_file, output_file, skip_zero_idfa=True):
@@ -43,37 +31,48 @@ def format_csv_for_tenjin(input_file, output_file, skip_zero_idfa=True):
 
     print(f"Reading file {input_file}...")
 
-    with open(input_file, 'r', encoding='utf-8') as infile, \
+    with open(input_file, 'r', encoding='utf-8', buffering=READ_BUFFER_SIZE) as infile, \
          open(output_file, 'w', encoding='utf-8', newline='') as outfile:
 
-        reader = csv.DictReader(infile)
+        reader = csv.reader(infile)
+
+        # Locate idfa/idfv columns once instead of building a dict per row
+        header = next(reader, [])
+        if 'idfa' not in header or 'idfv' not in header:
+            raise ValueError(f"Columns 'idfa' and 'idfv' are required in {input_file}")
+        i_idfa = header.index('idfa')
+        i_idfv = header.index('idfv')
+        min_length = max(i_idfa, i_idfv) + 1
+
+        reader = tqdm(reader, unit='row', mininterval=0.1)
         writer = csv.writer(outfile)
 
         # Write header with column names for Tenjin API
         writer.writerow(['advertising_id', 'developer_device_id'])
 
-        for row in reader:
-            total_rows += 1
-
-            # Display progress every 50000 records
-            if total_rows % 50000 == 0:
-                print(f"Processed {total_rows} lines, formatted {formatted_rows} lines...")
-
-            idfa = row.get('idfa', '').strip()
-            idfv = row.get('idfv', '').strip()
-
-            # Check if IDFA is zero
-            if skip_zero_idfa and idfa == '00000000-0000-0000-0000-000000000000':
-                skipped_zero_idfa += 1
-                continue
-
-            # Format UUIDs for Tenjin (lowercase, without dashes)
-            advertising_id = format_uuid_for_tenjin(idfa)
-            developer_device_id = format_uuid_for_tenjin(idfv)
-
-            # Write formatted line
-            writer.writerow([advertising_id, developer_device_id])
-            formatted_rows += 1
+        # Process rows by chunks: each step runs over a whole column of the chunk
+        while True:
+            chunk = list(islice(reader, CHUNK_SIZE))
+            if not chunk:
+                break
+            # Blank lines are not counted
+            total_rows += len(chunk) - chunk.count([])
+
+            # Truncated lines are ignored
+            pairs = [(row[i_idfa].strip(), row[i_idfv].strip()) for row in chunk if len(row) >= min_length]
+
+            # Drop zero IDFAs
+            if skip_zero_idfa:
+                kept = [pair for pair in pairs if pair[0] not in ZERO_IDFAS]
+                skipped_zero_idfa += len(pairs) - len(kept)
+                pairs = kept
+
+            # Format UUIDs for Tenjin (lowercase, without dashes) and write the whole chunk
+            write_rows(outfile, writer, [
+                (idfa.replace('-', '').lower(), idfv.replace('-', '').lower())
+                for idfa, idfv in pairs
+            ])
+            formatted_rows += len(pairs)
 
     print(f"\n✓ Formatting complete!")
     print(f"  - Total lines read: {total_rows}")
@@ -7,17 +7,127 @@ for each user, enabling better attribution even if one identifier is missing.
 """
 
 import csv
+import logging
+import re
 import requests
 import time
 import sys
 import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from requests.auth import HTTPBasicAuth
+from tqdm import tqdm
+from tqdm.contrib.logging import logging_redirect_tqdm
+from urllib3.util import Retry
+
+# Identifier formats in Tenjin format (lowercase hex, no dashes)
+# IDFA/IDFV/GAID are UUIDs; Android ID is a 64-bit hex number
+ADVERTISING_ID_PATTERN = re.compile(r'[0-9a-f]{32}')
+DEVICE_ID_PATTERNS = {
+    'ios': re.compile(r'[0-9a-f]{32}'),
+    'android': re.compile(r'[0-9a-f]{1,16}'),
+}
+
+# Error messages kept for the summary (total_errors counts all of them)
+MAX_KEPT_ERRORS = 1000
+
+# Minimum time between two rate changes (in seconds): X-RateLimit-Remaining resets every
+# window, so a run using its whole quota sees it near zero once per window
+RATE_ADJUST_INTERVAL = 10
+
+
+class TokenBucket:
+    """Token bucket rate limiter: only sleeps when no request token is available or the server asked to wait"""
+
+    def __init__(self, rate, capacity):
+        """
+        Args:
+            rate: Sustained number of requests per second (None = no limit, only server pauses apply)
+            capacity: Maximum number of tokens that can accumulate (burst size)
+        """
+        self.rate = rate
+        self.max_rate = rate
+        self.min_rate = rate / 16 if rate else None
+        # No request before this time (monotonic clock), set from Retry-After by any sending thread
+        self.paused_until = 0.0
+        # Times of the last rate change and of the last throttling signal
+        self.last_adjust = self.last_signal = time.monotonic()
+        self.capacity = capacity
+        # Start with a single token: bursts are only allowed to catch up after slow responses
+        self.tokens = 1.0
+        self.last = time.monotonic()
+
+    def acquire(self):
+        """Take one token, sleeping only if the bucket is empty or a pause is requested"""
+        now = time.monotonic()
+
+        # Server asked every sender to wait: resume with a single token (no burst after the pause)
+        if self.wait_pause():
+            now = self.last = time.monotonic()
+            self.tokens = 1.0
+
+        if self.rate is None:
+            return
+
+        self.tokens = min(self.capacity, self.tokens + (now - self.last) * self.rate)
+        self.last = now
+
+        # No throttling signal for a while: double the rate back, up to the configured one
+        if (self.rate < self.max_rate and now - self.last_signal >= RATE_ADJUST_INTERVAL
+                and now - self.last_adjust >= RATE_ADJUST_INTERVAL):
+            self.rate = min(self.rate * 2, self.max_rate)
+            self.last_adjust = now
+
+        if self.tokens < 1:
+            time.sleep((1 - self.tokens) / self.rate)
+            self.tokens = 1.0
+            self.last = time.monotonic()
+
+        self.tokens -= 1
+
+    def slow_down(self):
+        """Halve the sustained rate (bounded by 1/16 of the initial rate), at most once per RATE_ADJUST_INTERVAL"""
+        if self.rate is None:
+            return
+        now = time.monotonic()
+        self.last_signal = now
+        if now - self.last_adjust < RATE_ADJUST_INTERVAL and self.rate < self.max_rate:
+            return
+        self.rate = max(self.rate / 2, self.min_rate)
+        self.last_adjust = now
+
+    def wait_pause(self):
+        """
+        Sleep until the end of the current pause, if any (safe from any thread, takes no token)
+
+        Returns:
+            bool: True if a pause was waited for
+        """
+        wait = self.paused_until - time.monotonic()
+        if wait <= 0:
+            return False
+        time.sleep(wait)
+        return True
+
+    def pause(self, seconds):
+        """
+        Hold back all requests for the given time (called from sending threads)
+
+        Returns:
+            bool: True if the pause ends later than the current one
+        """
+        until = time.monotonic() + seconds
+        if until <= self.paused_until:
+            return False
+        self.paused_until = until
+        return True
 
 
 class TenjinImporter:
     """Client to send attributions to Tenjin"""
 
-    def __init__(self, sdk_key, bundle_id, platform='ios', batch_size=100, delay=0.1):
+    def __init__(self, sdk_key, bundle_id, platform='ios', batch_size=100, delay=0.1, workers=1, verbose=False):
         """
         Initialize Tenjin client
 
@@ -25,22 +135,66 @@ class TenjinImporter:
             sdk_key: Tenjin SDK key for authentication
             bundle_id: Application bundle ID
             platform: Platform (ios, android, etc.)
-            batch_size: Number of requests before pause
-            delay: Delay between requests (in seconds)
+            batch_size: Maximum burst of requests allowed after slow responses
+            delay: Target delay between requests (in seconds, 0 = no rate limit)
+            workers: Number of threads sending requests in parallel
+            verbose: If True, also log every successful send
         """
         self.sdk_key = sdk_key
         self.bundle_id = bundle_id
         self.platform = platform
         self.batch_size = batch_size
         self.delay = delay
+        self.workers = workers
+        self.bucket = TokenBucket(1 / delay if delay > 0 else None, batch_size)
         self.api_url = 'https://track.tenjin.io/v0/import_attribution'
 
+        # Reject malformed identifiers before spending a request on them
+        self.is_valid_advertising_id = ADVERTISING_ID_PATTERN.fullmatch
+        self.is_valid_device_id = DEVICE_ID_PATTERNS[platform].fullmatch
+
+        # Parameters common to every request, built once
+        self.base_params = {
+            'bundle_id': bundle_id,
+            'platform': platform,
+        }
+
+        # Reusable HTTP session: keep-alive avoids a new TCP/TLS handshake per request
+        self.session = requests.Session()
+        self.session.auth = HTTPBasicAuth(sdk_key, '')
+        # Transient failures (rate limit, server errors, network) are retried by the adapter
+        # with exponential backoff + jitter, honouring Retry-After
+        retry = Retry(
+            total=5,
+            backoff_factor=0.5,
+            backoff_jitter=0.25,
+            status_forcelist=[429, 500, 502, 503, 504],
+            allowed_methods=['POST'],
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        # One pooled connection per sending thread
+        self.session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=workers, max_retries=retry))
+
         # Statistics
         self.total_sent = 0
         self.total_success = 0
         self.total_errors = 0
+        self.total_invalid = 0
         self.errors = []
 
+        self.setup_logging(verbose)
+
+    def setup_logging(self, verbose):
+        """Configure logging system (messages are only formatted if their level is enabled)"""
+        self.logger = logging.getLogger('TenjinImporter')
+        self.logger.setLevel(logging.DEBUG if verbose else logging.INFO)
+
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s',
+                                                       datefmt='%Y-%m-%d %H:%M:%S'))
+        self.logger.addHandler(console_handler)
+
     def send_attribution(self, advertising_id, developer_device_id):
         """
         Send attribution to Tenjin
@@ -54,10 +208,7 @@ class TenjinImporter:
             tuple: (success: bool, status_code: int, response_text: str)
         """
         # Prepare parameters
-        params = {
-            'bundle_id': self.bundle_id,
-            'platform': self.platform,
-        }
+        params = self.base_params.copy()
 
         # Add advertising_id only if not empty
         if advertising_id:
@@ -67,21 +218,48 @@ class TenjinImporter:
         if developer_device_id:
             params['developer_device_id'] = developer_device_id
 
+        # Sends already handed to the thread pool also respect a pause requested meanwhile
+        self.bucket.wait_pause()
+
         try:
-            # Send request with Basic Auth authentication
-            response = requests.post(
+            # Send request (Basic Auth is set on the session)
+            response = self.session.post(
                 self.api_url,
                 params=params,
-                auth=HTTPBasicAuth(self.sdk_key, ''),
                 timeout=10
             )
 
+            self.apply_rate_limit_headers(response.headers)
+
             success = response.status_code in [200, 201, 204]
             return success, response.status_code, response.text
 
         except requests.exceptions.RequestException as e:
             return False, 0, str(e)
 
+    def apply_rate_limit_headers(self, headers):
+        """
+        Adapt the sending rate to the rate limit headers returned by Tenjin
+
+        Args:
+            headers: Response headers
+        """
+        # Server explicitly asks to wait before the next request: pause every sender, not
+        # just this thread (Retry-After between retries is already honoured by urllib3)
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            try:
+                wait = float(retry_after)
+            except ValueError:
+                wait = 0  # HTTP-date form is not supported, ignore it
+            if wait > 0 and self.bucket.pause(wait):
+                self.logger.warning("⏸  Rate limited, pausing sends for %.1fs (Retry-After)", wait)
+
+        # Quota almost exhausted: reduce the rate before getting a 429
+        remaining = headers.get('X-RateLimit-Remaining')
+        if remaining and remaining.isdigit() and int(remaining) <= 1:
+            self.bucket.slow_down()
+
     def import_from_csv(self, csv_file, start_line=1, max_lines=None, dry_run=False):
         """
         Import attributions from CSV file
@@ -92,22 +270,29 @@ class TenjinImporter:
             max_lines: Maximum number of lines to process (None = all)
             dry_run: If True, simulates sending without making real requests
         """
-        print(f"\n{'='*70}")
-        print(f"📤 Importing attributions to Tenjin")
-        print(f"{'='*70}")
-        print(f"File: {csv_file}")
-        print(f"Bundle ID: {self.bundle_id}")
-        print(f"Platform: {self.platform}")
-        print(f"Start line: {start_line}")
-        print(f"Max lines: {max_lines if max_lines else 'All'}")
-        print(f"Mode: {'DRY RUN (simulation)' if dry_run else 'PRODUCTION'}")
-        print(f"{'='*70}\n")
+        self.logger.info("="*70)
+        self.logger.info("📤 Importing attributions to Tenjin")
+        self.logger.info("="*70)
+        self.logger.info("File: %s", csv_file)
+        self.logger.info("Bundle ID: %s", self.bundle_id)
+        self.logger.info("Platform: %s", self.platform)
+        self.logger.info("Start line: %d", start_line)
+        self.logger.info("Max lines: %s", max_lines if max_lines else 'All')
+        self.logger.info("Workers: %d", self.workers)
+        self.logger.info("Mode: %s", 'DRY RUN (simulation)' if dry_run else 'PRODUCTION')
+        self.logger.info("="*70)
 
         if dry_run:
-            print("⚠️  DRY RUN MODE - No requests will be sent\n")
+            self.logger.warning("⚠️  DRY RUN MODE - No requests will be sent")
+
+        # Log lines are written above the progress bar instead of breaking it
+        with open(csv_file, 'r', encoding='utf-8') as f, \
+             ThreadPoolExecutor(max_workers=self.workers) as executor, \
+             logging_redirect_tqdm(loggers=[self.logger]), \
+             tqdm(csv.DictReader(f), unit='row', mininterval=0.1) as reader:
 
-        with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
+            # Sends in flight: (line, future), oldest first
+            pending = deque()
 
             current_line = 0
             processed = 0
@@ -121,7 +306,7 @@ class TenjinImporter:
 
                 # Stop if max_lines reached
                 if max_lines and processed >= max_lines:
-                    print(f"\n✓ Limit of {max_lines} lines reached")
+                    self.logger.info("✓ Limit of %d lines reached", max_lines)
                     break
 
                 advertising_id = row.get('advertising_id', '').strip()
@@ -129,73 +314,101 @@ class TenjinImporter:
 
                 # Validate we have at least one identifier
                 if not advertising_id and not developer_device_id:
-                    print(f"⚠️  Line {current_line}: No identifier found, skipped")
+                    self.logger.warning("⚠️  Line %d: No identifier found, skipped", current_line)
+                    continue
+
+                # Validate identifier format (would be rejected by Tenjin)
+                if (advertising_id and not self.is_valid_advertising_id(advertising_id)) or \
+                   (developer_device_id and not self.is_valid_device_id(developer_device_id)):
+                    self.logger.warning("⚠️  Line %d: Invalid identifier format, skipped", current_line)
+                    self.total_invalid += 1
                     continue
 
                 processed += 1
 
                 if dry_run:
                     # Simulation mode
-                    print(f"[DRY RUN] Line {current_line}: "
-                          f"IDFA={advertising_id[:8] if advertising_id else 'empty'}..., "
-                          f"IDFV={developer_device_id[:8]}...")
+                    self.logger.info("[DRY RUN] Line %d: IDFA=%s..., IDFV=%s...", current_line,
+                                     advertising_id[:8] if advertising_id else 'empty', developer_device_id[:8])
                     self.total_success += 1
                 else:
-                    # Real send
-                    success, status_code, response = self.send_attribution(
-                        advertising_id,
-                        developer_device_id
-                    )
-
-                    self.total_sent += 1
-
-                    if success:
-                        self.total_success += 1
-                        if processed % 10 == 0:
-                            print(f"✓ Line {current_line}: Sent successfully "
-                                  f"({self.total_success}/{self.total_sent})")
-                    else:
-                        self.total_errors += 1
-                        error_msg = f"Line {current_line}: Error {status_code} - {response}"
-                        print(f"✗ {error_msg}")
-                        self.errors.append(error_msg)
-
-                        # If too many consecutive errors, stop
-                        if self.total_errors >= 10 and self.total_success == 0:
-                            print("\n❌ Too many consecutive errors, stopping import")
+                    # Wait for a token to avoid rate limiting (and for a Retry-After pause)
+                    self.bucket.acquire()
+
+                    # Real send, in a worker thread
+                    future = executor.submit(self.send_attribution, advertising_id, developer_device_id)
+                    pending.append((current_line, future))
+
+                    # Keep a bounded window of sends in flight
+                    if len(pending) >= self.workers * 2:
+                        if not self.handle_result(*pending.popleft()):
+                            self.logger.error("❌ Authentication rejected (check SDK key), stopping import")
                             break
 
-                    # Pause between requests to avoid rate limiting
-                    if processed % self.batch_size == 0:
-                        print(f"⏸  Pause after {processed} requests...")
-                        time.sleep(1)
-                    else:
-                        time.sleep(self.delay)
+            # Wait for the remaining sends
+            while pending:
+                self.handle_result(*pending.popleft())
 
         # Display final statistics
         self.print_summary()
 
+    def handle_result(self, current_line, future):
+        """
+        Record the result of a send
+
+        Args:
+            current_line: CSV line of the attribution
+            future: Future returned by send_attribution
+
+        Returns:
+            bool: False if the import should stop (authentication rejected)
+        """
+        success, status_code, response = future.result()
+
+        self.total_sent += 1
+
+        if success:
+            self.total_success += 1
+            self.logger.debug("✓ Line %d: Sent successfully (%d/%d)",
+                              current_line, self.total_success, self.total_sent)
+        else:
+            self.total_errors += 1
+            error_msg = f"Line {current_line}: Error {status_code} - {response}"
+            self.logger.error("✗ %s", error_msg)
+            if len(self.errors) < MAX_KEPT_ERRORS:
+                self.errors.append(error_msg)
+
+        # Transient errors were already retried; only a rejected SDK key stops the import
+        return status_code not in (401, 403)
+
     def print_summary(self):
         """Display summary of results"""
-        print(f"\n{'='*70}")
-        print(f"📊 Import summary")
-        print(f"{'='*70}")
-        print(f"Total sent: {self.total_sent}")
-        print(f"✓ Success: {self.total_success}")
-        print(f"✗ Errors: {self.total_errors}")
+        self.logger.info("")
+        self.logger.info("="*70)
+        self.logger.info("📊 Import summary")
+        self.logger.info("="*70)
+        self.logger.info("Total sent: %d", self.total_sent)
+        self.logger.info("✓ Success: %d", self.total_success)
+        self.logger.info("✗ Errors: %d", self.total_errors)
+        if self.total_invalid:
+            self.logger.info("⚠️  Invalid identifiers skipped: %d", self.total_invalid)
 
         if self.total_sent > 0:
             success_rate = (self.total_success / self.total_sent) * 100
-            print(f"Success rate: {success_rate:.1f}%")
+            self.logger.info("Success rate: %.1f%%", success_rate)
 
         if self.errors:
-            print(f"\n⚠️  First errors:")
+            self.logger.warning("⚠️  First errors:")
             for error in self.errors[:5]:
-                print(f"  - {error}")
-            if len(self.errors) > 5:
-                print(f"  ... and {len(self.errors) - 5} other errors")
+                self.logger.warning("  - %s", error)
+            if self.total_errors > 5:
+                self.logger.warning("  ... and %d other errors", self.total_errors - 5)
+
+        self.logger.info("="*70)
 
-        print(f"{'='*70}\n")
+    def close(self):
+        """Close the HTTP session and its pooled connections"""
+        self.session.close()
 
 
 def main():
@@ -220,6 +433,9 @@ Usage examples:
   # Resume from line 1000
   python3 send_to_tenjin.py --start-line 1000
 
+  # Send with 20 parallel threads, up to 200 req/s
+  python3 send_to_tenjin.py --workers 20 --delay 0.005
+
   # Use different file
   python3 send_to_tenjin.py --file tenjin_formatted_transactions.csv
         """
@@ -261,19 +477,30 @@ Usage examples:
         '--batch-size',
         type=int,
         default=100,
-        help='Number of requests before long pause (default: 100)'
+        help='Maximum burst of requests allowed after slow responses (default: 100)'
     )
     parser.add_argument(
         '--delay',
         type=float,
         default=0.1,
-        help='Delay between requests in seconds (default: 0.1)'
+        help='Target delay between requests in seconds (default: 0.1, 0 = no rate limit)'
+    )
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=1,
+        help='Number of threads sending requests in parallel (default: 1)'
     )
     parser.add_argument(
         '--dry-run',
         action='store_true',
         help='Simulation without real sending (test)'
     )
+    parser.add_argument(
+        '--verbose',
+        action='store_true',
+        help='Also log every successful send'
+    )
 
     args = parser.parse_args()
 
@@ -295,7 +522,9 @@ Usage examples:
         bundle_id=args.bundle_id,
         platform=args.platform,
         batch_size=args.batch_size,
-        delay=args.delay
+        delay=args.delay,
+        workers=args.workers,
+        verbose=args.verbose
     )
 
     # Ask for confirmation if not dry-run and many lines
@@ -315,17 +544,19 @@ Usage examples:
             dry_run=args.dry_run
         )
     except FileNotFoundError:
-        print(f"❌ Error: The file '{args.file}' does not exist.")
+        importer.logger.error("❌ Error: The file '%s' does not exist.", args.file)
         sys.exit(1)
     except KeyboardInterrupt:
-        print("\n\n⚠️  Import interrupted by user")
+        importer.logger.warning("⚠️  Import interrupted by user")
         importer.print_summary()
         sys.exit(1)
     except Exception as e:
-        print(f"❌ Error: {e}")
+        importer.logger.error("❌ Error: %s", e)
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        importer.close()
 
 
 if __name__ == '__main__':
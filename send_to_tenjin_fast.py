@@ -5,23 +5,105 @@ Optimized version avec requêtes asynchrones parallèles pour vitesse maximale
 
 Sends simultaneously advertising_id (IDFA/GAID) + developer_device_id (IDFV/Android ID)
 for each user, enabling better attribution even if one identifier is missing.
+
+Install aiohttp with its speedups (pip install "aiohttp[speedups]") to resolve DNS
+with aiodns and use the C accelerated extras, and uvloop (not available on Windows)
+for a faster event loop. HTTP/2 (--client httpx) requires pip install "httpx[http2]".
 """
 
 import csv
 import asyncio
+import base64
+import contextlib
 import aiohttp
 import time
 import sys
 import os
 import logging
+import logging.handlers
+import itertools
+import queue
+import random
+import ssl
+from collections import deque
 from datetime import datetime
-from aiohttp import BasicAuth
+from urllib.parse import quote, urlencode
+
+from yarl import URL
+
+from common import combination_key
+
+# Asynchronous DNS resolution is only available with aiodns (aiohttp[speedups])
+try:
+    import aiodns
+    HAS_AIODNS = True
+except ImportError:
+    HAS_AIODNS = False
+
+# libuv based event loop, used by default when installed
+try:
+    import uvloop
+    HAS_UVLOOP = True
+except ImportError:
+    HAS_UVLOOP = False
+
+# HTTP/2 client: many requests multiplexed over a few connections (httpx needs h2 for HTTP/2)
+try:
+    import httpx
+    import h2
+    HAS_HTTPX = True
+except ImportError:
+    HAS_HTTPX = False
+
+# Successful HTTP statuses
+SUCCESS_STATUSES = {200, 201, 204}
+# Transient HTTP statuses worth retrying (rate limit, server overload)
+RETRY_STATUSES = {429, 500, 502, 503, 504, 529}
+# Maximum wait before a retry (in seconds)
+MAX_RETRY_DELAY = 30
+# Maximum wait for a connection (TCP + TLS) to the API (in seconds)
+CONNECT_TIMEOUT = 5
+# Bytes of an error response body kept for the error log
+MAX_ERROR_BODY = 256
+# Error messages kept for the summary (total_errors counts all of them)
+MAX_KEPT_ERRORS = 1000
+# CSV rows parsed per read in the reader thread
+READ_CHUNK_SIZE = 1000
+# Adaptive concurrency: recent sends considered, check interval (seconds) and lower bound
+ADAPT_WINDOW = 200
+ADAPT_INTERVAL = 2
+MIN_CONCURRENCY = 4
+# Rejected requests (non-retryable 4xx) without any success before the import is stopped
+MAX_INITIAL_REJECTIONS = 10
+
+
+class RateLimiter:
+    """Space out request starts so the overall rate stays under a maximum"""
+
+    def __init__(self, delay):
+        """
+        Args:
+            delay: Minimum delay between two request starts (in seconds)
+        """
+        self.delay = delay
+        self.next_slot = 0.0
+
+    async def acquire(self):
+        """Wait until the next request slot is available"""
+        now = asyncio.get_running_loop().time()
+        slot = max(now, self.next_slot)
+        # Reserve the slot before sleeping so concurrent callers queue up behind it
+        self.next_slot = slot + self.delay
+        if slot > now:
+            await asyncio.sleep(slot - now)
 
 
 class TenjinImporter:
     """Client to send des attributions à Tenjin with parallel requests"""
 
-    def __init__(self, sdk_key, bundle_id, platform='ios', batch_size=1000, concurrency=50, log_file=None):
+    def __init__(self, sdk_key, bundle_id, platform='ios', batch_size=1000, concurrency=50, delay=0, max_retries=5,
+                 timeout_total=30, timeout_read=15, dedupe=True, connections=None, client='aiohttp',
+                 warmup=0, log_file=None):
         """
         Initialize Tenjin client
 
@@ -31,6 +113,14 @@ class TenjinImporter:
             platform: Platform (ios, android, etc.)
             batch_size: Number of requests before progress report
             concurrency: Number of concurrent requests (default: 50)
+            delay: Minimum delay between requests in seconds (0 = no rate limit)
+            max_retries: Number of retries for transient errors (429, 5xx, timeouts)
+            timeout_total: Maximum duration of a request attempt (in seconds)
+            timeout_read: Maximum wait for response data (in seconds)
+            dedupe: If True, send each (advertising_id, developer_device_id) combination once
+            connections: Maximum number of open connections (None = concurrency)
+            client: HTTP client: 'aiohttp' (HTTP/1.1) or 'httpx' (HTTP/2)
+            warmup: Number of HEAD requests opening connections before sending (0 = none)
             log_file: Log file (None = no file)
         """
         self.sdk_key = sdk_key
@@ -38,15 +128,62 @@ class TenjinImporter:
         self.platform = platform
         self.batch_size = batch_size
         self.concurrency = concurrency
+        self.connections = connections or concurrency
+        if client == 'httpx' and not HAS_HTTPX:
+            raise RuntimeError('httpx with HTTP/2 support is not installed (pip install "httpx[http2]")')
+        self.client = client
+        self.warmup = warmup
+        self.rate_limiter = RateLimiter(delay) if delay > 0 else None
+        self.max_retries = max_retries
+        self.dedupe = dedupe
         self.api_url = 'https://track.tenjin.io/v0/import_attribution'
+        # TLS context shared by all connections
+        self.ssl_context = ssl.create_default_context()
+
+        # Request parts that never change, built once instead of per request
+        credentials = base64.b64encode(f'{sdk_key}:'.encode('latin1')).decode('ascii')
+        self.auth_headers = {'Authorization': f'Basic {credentials}'}
+        # Connection problems are detected quickly without cutting short slow responses.
+        # No connect limit: it would also cover waiting for a free pool slot (connections < concurrency)
+        self.timeout = aiohttp.ClientTimeout(total=timeout_total, connect=None,
+                                             sock_connect=CONNECT_TIMEOUT, sock_read=timeout_read)
+        self.timeout_total = timeout_total
+        self.timeout_read = timeout_read
+
+        # Send path of the selected client, and its transient (retried) exceptions
+        self.transient_errors = (asyncio.TimeoutError, aiohttp.ClientConnectionError)
+        if client == 'httpx':
+            self.post = self.post_httpx
+            self.transient_errors += (httpx.TransportError,)
+        else:
+            self.post = self.post_aiohttp
+        # Static part of the query string, encoded once
+        self.url_prefix = f"{self.api_url}?{urlencode({'bundle_id': bundle_id, 'platform': platform})}"
 
         # Statistiques
         self.total_sent = 0
         self.total_success = 0
         self.total_errors = 0
+        self.total_retries = 0
+        self.total_rejected = 0
+        self.dedup_skipped = 0
         self.errors = []
         self.start_time = None
-        self.lock = None  # Sera créé dans la boucle d'événements
+        self.stopped = False
+        # Adaptive concurrency: outcomes of the latest sends, concurrency currently allowed
+        self.recent_results = deque(maxlen=ADAPT_WINDOW)
+        self.active_concurrency = concurrency
+        self.in_flight = 0
+        self.slot_freed = None
+        # Progress reports
+        # Lines taken by workers and not finished yet (sending or waiting to retry), last line taken
+        self.in_flight_lines = set()
+        self.last_taken_line = 0
+        self.last_report_time = None
+        self.last_report_sent = 0
+        # Estimated number of lines to send (None until counted) and end of counting
+        self.total_rows = None
+        self.counting_cancelled = False
 
         # Configuration du logging
         self.setup_logging(log_file)
@@ -68,21 +205,37 @@ class TenjinImporter:
         console_handler.setFormatter(console_formatter)
         self.logger.addHandler(console_handler)
 
-        # File handler if specified
+        # File handler if specified, written by a background thread so disk I/O never blocks the event loop
+        self.log_listener = None
+        self.log_handler = None
         if log_file:
             file_handler = logging.FileHandler(log_file, mode='a', encoding='utf-8')
             file_handler.setLevel(logging.INFO)
             file_formatter = logging.Formatter(log_format, datefmt=date_format)
             file_handler.setFormatter(file_formatter)
-            self.logger.addHandler(file_handler)
+            log_queue = queue.Queue()
+            self.log_listener = logging.handlers.QueueListener(log_queue, file_handler)
+            self.log_listener.start()
+            self.log_handler = logging.handlers.QueueHandler(log_queue)
+            self.logger.addHandler(self.log_handler)
+
+    def close(self):
+        """Detach the log file from the logger, flush its queued records and stop its writer thread"""
+        if self.log_handler:
+            self.logger.removeHandler(self.log_handler)
+            self.log_handler = None
+        if self.log_listener:
+            self.log_listener.stop()
+            self.log_listener = None
 
     async def send_attribution(self, session, advertising_id, developer_device_id, line_number):
         """
         Send attribution to Tenjin asynchronously
         Sends simultaneously les deux identifiants (advertising_id + developer_device_id)
+        Transient errors are retried up to max_retries times with exponential backoff
 
         Args:
-            session: Session aiohttp
+            session: Session aiohttp (or httpx.AsyncClient)
             advertising_id: IDFA (iOS) ou GAID (Android) - can be empty or None
             developer_device_id: IDFV (iOS) ou Android ID (Android) - required
             line_number: Line number for error logs
@@ -90,59 +243,483 @@ class TenjinImporter:
         Returns:
             tuple: (success: bool, status_code: int, response_text: str, line_number: int)
         """
-        # Prepare parameters
-        params = {
-            'bundle_id': self.bundle_id,
-            'platform': self.platform,
-        }
+        # Prepare URL: only identifiers are encoded per request
+        url = self.url_prefix
 
         # Add advertising_id only if not empty
         if advertising_id:
-            params['advertising_id'] = advertising_id
+            url += '&advertising_id=' + quote(advertising_id, safe='')
 
         # Add developer_device_id (required pour iOS)
         if developer_device_id:
-            params['developer_device_id'] = developer_device_id
+            url += '&developer_device_id=' + quote(developer_device_id, safe='')
+
+        for attempt in range(self.max_retries + 1):
+            retry_after = None
+
+            try:
+                status_code, body, retry_after = await self.post(session, url)
+
+                if status_code in SUCCESS_STATUSES:
+                    return True, status_code, '', line_number
+                if status_code not in RETRY_STATUSES or attempt == self.max_retries:
+                    return False, status_code, body.decode('utf-8', errors='replace'), line_number
+
+            except self.transient_errors as e:
+                if attempt == self.max_retries:
+                    return False, 0, str(e) or type(e).__name__, line_number
+
+            except Exception as e:
+                return False, 0, str(e), line_number
+
+            # Transient error: wait, then take a new rate limit slot
+            self.total_retries += 1
+            await asyncio.sleep(self.retry_delay(attempt, retry_after))
+            if self.rate_limiter:
+                await self.rate_limiter.acquire()
+
+    async def post_aiohttp(self, session, url):
+        """
+        Send one request with aiohttp
+
+        Args:
+            session: Session aiohttp
+            url: Request URL, query string already encoded
+
+        Returns:
+            tuple: (status_code: int, body: bytes (beginning, errors only), retry_after: str or None)
+        """
+        # Send request with Basic Auth authentication (pre-encoded header), skip yarl's re-quoting
+        async with session.post(
+            URL(url, encoded=True),
+            headers=self.auth_headers,
+            timeout=self.timeout
+        ) as response:
+            # Success body is not used: read it (so the connection can be reused) but don't decode it
+            if response.status in SUCCESS_STATUSES:
+                await response.read()
+                return response.status, b'', None
+
+            # Read the whole error body so the connection is reused; only its beginning is kept for logs
+            body = await response.read()
+            return response.status, body[:MAX_ERROR_BODY], response.headers.get('Retry-After')
+
+    async def post_httpx(self, client, url):
+        """
+        Send one request with httpx (HTTP/2), see post_aiohttp
+
+        Args:
+            client: httpx.AsyncClient
+            url: Request URL, query string already encoded
+        """
+        # httpx has no overall request timeout: apply timeout_total like aiohttp does
+        response = await asyncio.wait_for(client.post(url, headers=self.auth_headers), self.timeout_total)
+        return response.status_code, response.content[:MAX_ERROR_BODY], response.headers.get('Retry-After')
+
+    def create_session(self):
+        """
+        Create the HTTP session shared by all workers
+
+        Returns:
+            aiohttp.ClientSession or httpx.AsyncClient, to be used as an async context manager
+        """
+        if self.client == 'httpx':
+            # Requests are multiplexed over HTTP/2 connections
+            return httpx.AsyncClient(
+                http2=True,
+                verify=self.ssl_context,
+                timeout=httpx.Timeout(self.timeout_read, connect=CONNECT_TIMEOUT, pool=None),
+                limits=httpx.Limits(max_connections=self.connections,
+                                    max_keepalive_connections=self.connections,
+                                    keepalive_expiry=75)
+            )
+
+        # A single host, so resolve it once and keep connections alive
+        connector = aiohttp.TCPConnector(
+            limit=self.connections,
+            limit_per_host=self.connections,
+            use_dns_cache=True,
+            ttl_dns_cache=300,
+            keepalive_timeout=75,
+            ssl=self.ssl_context,
+            resolver=aiohttp.AsyncResolver() if HAS_AIODNS else None
+        )
+        return aiohttp.ClientSession(connector=connector)
+
+    async def warm_up(self, session):
+        """
+        Open connections ahead of the import with concurrent HEAD requests (results ignored)
+
+        Args:
+            session: Session aiohttp (or httpx.AsyncClient)
+        """
+        async def head():
+            if self.client == 'httpx':
+                await session.head(self.api_url)
+            else:
+                async with session.head(self.api_url, timeout=self.timeout):
+                    pass
+
+        start = time.time()
+        await asyncio.gather(*[head() for _ in range(self.warmup)], return_exceptions=True)
+        self.logger.info(f"🔥 Warmed up {self.warmup} connections in {time.time() - start:.2f}s")
 
+    def retry_delay(self, attempt, retry_after=None):
+        """
+        Compute the wait before retrying a request
+
+        Args:
+            attempt: Number of the failed attempt (0 = first)
+            retry_after: Retry-After header value, if any
+
+        Returns:
+            float: Delay in seconds: Retry-After if given, else exponential backoff with jitter
+        """
         try:
-            # Send request with Basic Auth authentication
-            async with session.post(
-                self.api_url,
-                params=params,
-                auth=BasicAuth(self.sdk_key, ''),
-                timeout=aiohttp.ClientTimeout(total=10)
-            ) as response:
-                status_code = response.status
-                response_text = await response.text()
-                success = status_code in [200, 201, 204]
-                return success, status_code, response_text, line_number
-
-        except Exception as e:
-            return False, 0, str(e), line_number
-
-    async def process_batch(self, session, tasks, lock):
-        """Process a batch of tasks in parallel"""
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        
-        async with lock:
-            for result in results:
-                if isinstance(result, Exception):
-                    self.total_sent += 1
-                    self.total_errors += 1
-                    error_msg = f"Exception: {str(result)[:100]}"
-                    self.errors.append(error_msg)
-                else:
-                    success, status_code, response, line_number = result
-                    self.total_sent += 1
-                    
-                    if success:
-                        self.total_success += 1
+            delay = float(retry_after) if retry_after else 0
+        except ValueError:
+            delay = 0  # HTTP-date form is not supported, use backoff
+        if delay <= 0:
+            delay = random.uniform(1, 2) * 2 ** attempt
+        return min(delay, MAX_RETRY_DELAY)
+
+    def record_result(self, success, status_code, response, line_number):
+        """Update statistics with the result of send_attribution"""
+        self.total_sent += 1
+        self.in_flight_lines.discard(line_number)
+
+        # Only server load (429/5xx, network errors) is a reason to change concurrency
+        if success or status_code == 0 or status_code in RETRY_STATUSES:
+            self.recent_results.append(success)
+        else:
+            self.total_rejected += 1
+
+        if success:
+            self.total_success += 1
+        else:
+            self.total_errors += 1
+            error_msg = f"Line {line_number}: HTTP {status_code} - {response[:100]}"
+            if self.total_errors <= 10:  # Limit error logs
+                self.logger.error(f"✗ {error_msg}")
+            if len(self.errors) < MAX_KEPT_ERRORS:
+                self.errors.append(error_msg)
+
+    def completed_line(self):
+        """
+        Low watermark of the import: every line up to the returned one is finished (sent or skipped)
+        Workers take lines in file order, so only lines in flight can be unfinished below the last one taken
+
+        Returns:
+            int: Line to resume after (--start-line completed_line + 1)
+        """
+        if self.in_flight_lines:
+            return min(self.in_flight_lines) - 1
+        return self.last_taken_line
+
+    def report_progress(self):
+        """Log sending progress since the previous report"""
+        now = time.time()
+        elapsed = now - self.last_report_time
+        rate = (self.total_sent - self.last_report_sent) / elapsed if elapsed > 0 else 0
+        total_elapsed = now - self.start_time
+
+        # Estimate remaining time (once the lines to send are counted)
+        if self.total_sent > 0 and self.total_rows is not None:
+            avg_time_per_request = total_elapsed / self.total_sent
+            remaining = max(self.total_rows - self.total_sent, 0) * avg_time_per_request
+            eta = self.format_time(remaining)
+        else:
+            eta = "calculating..."
+
+        success_rate = (self.total_success / self.total_sent * 100) if self.total_sent > 0 else 100
+
+        self.logger.info(
+            f"📊 Line {self.completed_line():,} | "
+            f"Sent: {self.total_sent:,} | "
+            f"Success: {self.total_success:,} ({success_rate:.1f}%) | "
+            f"Errors: {self.total_errors} | "
+            f"Speed: {rate:.1f} req/s | "
+            f"ETA: {eta}"
+        )
+
+        self.last_report_time = now
+        self.last_report_sent = self.total_sent
+
+    def count_data_lines(self, csv_file):
+        """
+        Count lines after the header without parsing them (blocking: run in a thread)
+
+        Returns:
+            int: Number of lines, or None if the import ended before the count
+        """
+        lines = 0
+        with open(csv_file, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                if self.counting_cancelled:
+                    return None
+                lines += chunk.count(b'\n')
+        return max(lines - 1, 0)
+
+    async def estimate_total_rows(self, csv_file, start_line, max_lines):
+        """
+        Set total_rows (used for the ETA only) from a line count done in a thread while sending
+
+        Args:
+            csv_file: Path to CSV file
+            start_line: Start line (1 = first line after header)
+            max_lines: Maximum number of lines to process (None = all)
+        """
+        lines = await asyncio.to_thread(self.count_data_lines, csv_file)
+        if lines is None:
+            return
+        total_rows = max(lines - (start_line - 1), 0)
+        if max_lines:
+            total_rows = min(total_rows, max_lines)
+        self.total_rows = total_rows
+        self.logger.info(f"📋 ~{total_rows:,} lines to process")
+
+    def iter_rows(self, reader, start_line, max_lines):
+        """
+        Read attributions to send from CSV (blocking: run in a thread, see produce_rows)
+
+        Args:
+            reader: csv.reader on the input file, header not read yet
+            start_line: Start line (1 = first line after header)
+            max_lines: Maximum number of lines to process (None = all)
+
+        Yields:
+            tuple: (line_number, advertising_id, developer_device_id)
+        """
+        # Resolve column positions once instead of building a dict per row
+        header = next(reader, [])
+        if 'advertising_id' not in header or 'developer_device_id' not in header:
+            raise ValueError("Columns 'advertising_id' and 'developer_device_id' are required")
+        i_adv = header.index('advertising_id')
+        i_dev = header.index('developer_device_id')
+        min_length = max(i_adv, i_dev) + 1
+
+        # Combinations already queued (packed keys, see combination_key)
+        seen = set() if self.dedupe else None
+
+        current_line = 0
+        queued = 0
+
+        for row in reader:
+            # Skip blank lines (not counted, like csv.DictReader)
+            if not row:
+                continue
+
+            current_line += 1
+
+            # Ignore lines before start_line (already sent, but remembered for deduplication)
+            if current_line < start_line:
+                if seen is not None and len(row) >= min_length:
+                    seen.add(combination_key(row[i_adv].strip(), row[i_dev].strip()))
+                continue
+
+            # Stop if max_lines reached
+            if max_lines and queued >= max_lines:
+                break
+
+            # Truncated lines have missing identifiers
+            if len(row) >= min_length:
+                advertising_id = row[i_adv].strip()
+                developer_device_id = row[i_dev].strip()
+            else:
+                advertising_id = developer_device_id = ''
+
+            # Validate we have at least one identifier
+            if not advertising_id and not developer_device_id:
+                self.logger.warning(f"⚠️  Line {current_line}: No identifier, skipped")
+                continue
+
+            # Skip combinations already sent
+            if seen is not None:
+                key = combination_key(advertising_id, developer_device_id)
+                if key in seen:
+                    self.dedup_skipped += 1
+                    self.logger.debug("Line %d: duplicate, skipped", current_line)
+                    continue
+                seen.add(key)
+
+            yield current_line, advertising_id, developer_device_id
+            queued += 1
+
+    async def produce_rows(self, reader, queue, start_line, max_lines):
+        """
+        Push attributions read from CSV to the send queue
+        Rows are parsed by chunks in a thread, so disk reads never block the event loop
+
+        Args:
+            reader: csv.reader on the input file, header not read yet
+            queue: asyncio.Queue receiving (line_number, advertising_id, developer_device_id),
+                   then None once all lines are read
+            start_line: Start line (1 = first line after header)
+            max_lines: Maximum number of lines to process (None = all)
+        """
+        rows = self.iter_rows(reader, start_line, max_lines)
+
+        def read_chunk():
+            return list(itertools.islice(rows, READ_CHUNK_SIZE))
+
+        next_chunk = asyncio.ensure_future(asyncio.to_thread(read_chunk))
+        try:
+            while True:
+                chunk = await next_chunk
+                if not chunk:
+                    break
+
+                # Read the next chunk while this one is being sent
+                next_chunk = asyncio.ensure_future(asyncio.to_thread(read_chunk))
+
+                for item in chunk:
+                    # Only wait (await) while the queue is full
+                    if queue.full():
+                        await queue.put(item)
                     else:
-                        self.total_errors += 1
-                        error_msg = f"Line {line_number}: HTTP {status_code} - {response[:100]}"
-                        if self.total_errors <= 10:  # Limit error logs
-                            self.logger.error(f"✗ {error_msg}")
-                        self.errors.append(error_msg)
+                        queue.put_nowait(item)
+
+        except Exception:
+            # Unblock the consumer; the error is re-raised when the producer is awaited
+            await queue.put(None)
+            raise
+        finally:
+            next_chunk.cancel()
+
+        await queue.put(None)
+
+    async def send_worker(self, session, queue):
+        """
+        Worker: send queued attributions until the queue is exhausted or the import is stopped
+
+        Args:
+            session: Session aiohttp
+            queue: asyncio.Queue filled by produce_rows
+        """
+        while not self.stopped:
+            item = await queue.get()
+            if item is None:
+                # Leave the end marker for the other workers
+                queue.put_nowait(None)
+                return
+
+            line_number, advertising_id, developer_device_id = item
+            self.in_flight_lines.add(line_number)
+            self.last_taken_line = line_number
+
+            # Wait for a free slot while the adaptive controller has lowered concurrency
+            while self.in_flight >= self.active_concurrency:
+                self.slot_freed.clear()
+                await self.slot_freed.wait()
+
+            self.in_flight += 1
+            try:
+                if self.rate_limiter:
+                    await self.rate_limiter.acquire()
+                result = await self.send_attribution(session, advertising_id, developer_device_id, line_number)
+            finally:
+                self.in_flight -= 1
+                self.slot_freed.set()
+
+            # No lock needed: workers share one event loop and nothing below awaits
+            self.record_result(*result)
+
+            # Progress report every batch_size sends
+            if self.total_sent % self.batch_size == 0:
+                self.report_progress()
+
+            # Retrying or slowing down can't fix a rejected SDK key or a wrong configuration
+            if result[1] in (401, 403) and not self.stopped:
+                self.logger.error("❌ Authentication rejected (check SDK key), stopping import")
+                self.stopped = True
+            elif (self.total_success == 0 and self.total_rejected >= MAX_INITIAL_REJECTIONS
+                  and not self.stopped):
+                self.logger.error(
+                    f"❌ First {self.total_rejected} requests rejected (check bundle ID and platform), "
+                    f"stopping import"
+                )
+                self.stopped = True
+
+    async def adapt_concurrency(self):
+        """
+        Adaptive controller: every ADAPT_INTERVAL seconds, halve concurrency when fewer than
+        half of the latest sends succeed, and double it back (up to concurrency) above 95%
+        Rejected requests (non-retryable 4xx) are not counted: lowering concurrency can't fix them
+        """
+        while True:
+            await asyncio.sleep(ADAPT_INTERVAL)
+
+            # Decide on a full window of sends made at the current concurrency
+            if len(self.recent_results) < ADAPT_WINDOW:
+                continue
+            success_rate = sum(self.recent_results) / ADAPT_WINDOW
+
+            previous = self.active_concurrency
+            if success_rate < 0.5 and previous > MIN_CONCURRENCY:
+                self.active_concurrency = max(previous // 2, MIN_CONCURRENCY)
+                self.logger.info(
+                    f"🐢 Success rate {success_rate:.0%} over the last {ADAPT_WINDOW} sends, "
+                    f"concurrency {previous} → {self.active_concurrency}"
+                )
+            elif success_rate > 0.95 and previous < self.concurrency:
+                self.active_concurrency = min(previous * 2, self.concurrency)
+                self.logger.info(
+                    f"🚀 Success rate {success_rate:.0%} over the last {ADAPT_WINDOW} sends, "
+                    f"concurrency {previous} → {self.active_concurrency}"
+                )
+                # Wake up workers waiting for a slot
+                self.slot_freed.set()
+            else:
+                continue
+
+            self.recent_results.clear()
+
+    async def run_workers(self, session, queue):
+        """
+        Run concurrency send_worker tasks until they all return
+        A worker error cancels the other workers (asyncio.TaskGroup, Python 3.11+)
+
+        Args:
+            session: Session aiohttp (or httpx.AsyncClient)
+            queue: asyncio.Queue filled by produce_rows
+        """
+        if sys.version_info < (3, 11):
+            await asyncio.gather(*[
+                self.send_worker(session, queue) for _ in range(self.concurrency)
+            ])
+            return
+
+        try:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(self.concurrency):
+                    group.create_task(self.send_worker(session, queue))
+        except BaseExceptionGroup as errors:
+            # Re-raise the worker error itself, as gather does
+            raise errors.exceptions[0]
+
+    async def send_from_queue(self, queue):
+        """
+        Send queued attributions with concurrency long-lived workers
+
+        Args:
+            queue: asyncio.Queue filled by produce_rows
+        """
+        # Create reusable HTTP session
+        async with self.create_session() as session:
+            if self.warmup:
+                await self.warm_up(session)
+            self.last_report_time = time.time()
+            self.slot_freed = asyncio.Event()
+            controller = asyncio.create_task(self.adapt_concurrency())
+
+            try:
+                await self.run_workers(session, queue)
+            finally:
+                controller.cancel()
+
+            # Report the last partial batch
+            if self.total_sent % self.batch_size:
+                self.report_progress()
 
     async def import_from_csv_async(self, csv_file, start_line=1, max_lines=None, dry_run=False):
         """
@@ -155,6 +732,7 @@ class TenjinImporter:
             dry_run: If True, simulates sending without making real requests
         """
         self.start_time = time.time()
+        self.last_taken_line = start_line - 1
 
         self.logger.info("="*70)
         self.logger.info("📤 STARTING TENJIN IMPORT (ASYNC MODE)")
@@ -166,106 +744,63 @@ class TenjinImporter:
         self.logger.info(f"Max lines: {max_lines if max_lines else 'All'}")
         self.logger.info(f"Batch size: {self.batch_size}")
         self.logger.info(f"Concurrent requests: {self.concurrency}")
+        self.logger.info(f"Max connections: {self.connections}")
+        self.logger.info(f"HTTP client: {'httpx (HTTP/2)' if self.client == 'httpx' else 'aiohttp (HTTP/1.1)'}")
+        self.logger.info(f"Event loop: {type(asyncio.get_running_loop()).__module__.split('.')[0]}")
+        if self.rate_limiter:
+            self.logger.info(f"Rate limit: {1 / self.rate_limiter.delay:.1f} req/s")
         self.logger.info(f"Mode: {'DRY RUN (simulation)' if dry_run else 'PRODUCTION'}")
         self.logger.info("="*70)
 
         if dry_run:
             self.logger.warning("⚠️  DRY RUN MODE - No requests will be sent")
 
-        # Read all lines to process
-        rows_to_process = []
         with open(csv_file, 'r', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            current_line = 0
-            
-            for row in reader:
-                current_line += 1
-                
-                # Ignore lines before start_line
-                if current_line < start_line:
-                    continue
-                
-                # Stop if max_lines reached
-                if max_lines and len(rows_to_process) >= max_lines:
-                    break
-                
-                advertising_id = row.get('advertising_id', '').strip()
-                developer_device_id = row.get('developer_device_id', '').strip()
-                
-                # Validate we have at least one identifier
-                if not advertising_id and not developer_device_id:
-                    self.logger.warning(f"⚠️  Line {current_line}: No identifier, skipped")
-                    continue
-                
-                rows_to_process.append((current_line, advertising_id, developer_device_id))
-        
-        total_rows = len(rows_to_process)
-        self.logger.info(f"📋 {total_rows:,} lines to process")
-        
-        if dry_run:
-            self.total_success = total_rows
-            self.print_summary()
-            return
+            # Only used for the ETA: lines are counted in a thread while sending starts
+            counter = asyncio.create_task(self.estimate_total_rows(csv_file, start_line, max_lines))
 
-        # Create reusable HTTP session
-        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.concurrency)
-        async with aiohttp.ClientSession(connector=connector) as session:
-            semaphore = asyncio.Semaphore(self.concurrency)
-            lock = asyncio.Lock()
-            last_report_time = time.time()
-            processed = 0
-            
-            async def send_with_semaphore(line_num, adv_id, dev_id):
-                async with semaphore:
-                    return await self.send_attribution(session, adv_id, dev_id, line_num)
-            
-            # Process in batches for progress reports
-            for i in range(0, total_rows, self.batch_size):
-                batch = rows_to_process[i:i + self.batch_size]
-                tasks = [send_with_semaphore(line_num, adv_id, dev_id) 
-                        for line_num, adv_id, dev_id in batch]
-                
-                await self.process_batch(session, tasks, lock)
-                processed += len(batch)
-                
-                # Progress report
-                elapsed = time.time() - last_report_time
-                rate = len(batch) / elapsed if elapsed > 0 else 0
-                total_elapsed = time.time() - self.start_time
-                
-                # Estimate remaining time
-                if self.total_sent > 0:
-                    avg_time_per_request = total_elapsed / self.total_sent
-                    remaining = (total_rows - processed) * avg_time_per_request
-                    eta = self.format_time(remaining)
+            # Rows are read while sending: memory is bounded by the queue size
+            queue = asyncio.Queue(maxsize=self.concurrency * 4)
+            producer = asyncio.create_task(
+                self.produce_rows(csv.reader(f), queue, start_line, max_lines)
+            )
+
+            try:
+                if dry_run:
+                    while await queue.get() is not None:
+                        self.total_success += 1
                 else:
-                    eta = "calculating..."
-                
-                success_rate = (self.total_success / self.total_sent * 100) if self.total_sent > 0 else 100
-                current_line = batch[-1][0] if batch else 0
-                
-                self.logger.info(
-                    f"📊 Line {current_line:,} | "
-                    f"Sent: {self.total_sent:,} | "
-                    f"Success: {self.total_success:,} ({success_rate:.1f}%) | "
-                    f"Errors: {self.total_errors} | "
-                    f"Speed: {rate:.1f} req/s | "
-                    f"ETA: {eta}"
-                )
-                
-                last_report_time = time.time()
-                
-                # Stop if too many errors at start
-                if self.total_errors >= 10 and self.total_success == 0:
-                    self.logger.error("❌ Too many consecutive errors, stopping import")
-                    break
+                    await self.send_from_queue(queue)
+            finally:
+                # Stop reading if sending ended early; re-raise a reading error, if any
+                producer.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await producer
+                # Stop counting if not done yet
+                self.counting_cancelled = True
+                counter.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await counter
 
         # Display final statistics
         self.print_summary()
 
-    def import_from_csv(self, csv_file, start_line=1, max_lines=None, dry_run=False):
-        """Synchronous wrapper for async import"""
-        asyncio.run(self.import_from_csv_async(csv_file, start_line, max_lines, dry_run))
+    def import_from_csv(self, csv_file, start_line=1, max_lines=None, dry_run=False, loop='auto'):
+        """
+        Synchronous wrapper for async import
+
+        Args:
+            loop: Event loop: 'uvloop', 'asyncio', or 'auto' (uvloop if installed)
+            Other arguments: see import_from_csv_async
+        """
+        if loop == 'uvloop' and not HAS_UVLOOP:
+            raise RuntimeError("uvloop is not installed (pip install uvloop)")
+
+        coroutine = self.import_from_csv_async(csv_file, start_line, max_lines, dry_run)
+        if loop != 'asyncio' and HAS_UVLOOP:
+            uvloop.run(coroutine)
+        else:
+            asyncio.run(coroutine)
 
     def format_time(self, seconds):
         """Format time in seconds to readable format"""
@@ -288,8 +823,14 @@ class TenjinImporter:
         self.logger.info("="*70)
         self.logger.info(f"Total duration: {self.format_time(total_time)}")
         self.logger.info(f"Total sent: {self.total_sent:,}")
+        if self.start_time:
+            completed = self.completed_line()
+            self.logger.info(f"Completed up to line: {completed:,} (resume with --start-line {completed + 1})")
         self.logger.info(f"✓ Success: {self.total_success:,}")
         self.logger.info(f"✗ Errors: {self.total_errors:,}")
+        self.logger.info(f"🔁 Retries: {self.total_retries:,}")
+        if self.dedupe:
+            self.logger.info(f"♻️  Duplicates skipped: {self.dedup_skipped:,}")
 
         if self.total_sent > 0:
             success_rate = (self.total_success / self.total_sent) * 100
@@ -298,11 +839,11 @@ class TenjinImporter:
             self.logger.info(f"Average speed: {avg_rate:.2f} req/s")
 
         if self.errors:
-            self.logger.warning(f"\n⚠️  First errors ({min(5, len(self.errors))} out of {len(self.errors)}):")
+            self.logger.warning(f"\n⚠️  First errors ({min(5, len(self.errors))} out of {self.total_errors:,}):")
             for error in self.errors[:5]:
                 self.logger.warning(f"  - {error}")
-            if len(self.errors) > 5:
-                self.logger.warning(f"  ... et {len(self.errors) - 5} other errors")
+            if self.total_errors > 5:
+                self.logger.warning(f"  ... et {self.total_errors - 5:,} other errors")
 
         self.logger.info("="*70)
 
@@ -379,6 +920,59 @@ Usage examples:
         default=50,
         help='Number of concurrent requests (default: 50, recommended: 50-100)'
     )
+    parser.add_argument(
+        '--connections',
+        type=int,
+        help='Maximum number of open connections (default: same as --concurrency); '
+             'requests beyond it wait for a free keep-alive connection (the wait counts in --timeout-total)'
+    )
+    parser.add_argument(
+        '--delay',
+        type=float,
+        default=0,
+        help='Minimum delay between requests in seconds (default: 0 = no rate limit)'
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=5,
+        help='Retries for 429/5xx responses and timeouts, with exponential backoff (default: 5)'
+    )
+    parser.add_argument(
+        '--timeout-total',
+        type=float,
+        default=30,
+        help='Maximum duration of a request attempt in seconds (default: 30)'
+    )
+    parser.add_argument(
+        '--timeout-read',
+        type=float,
+        default=15,
+        help='Maximum wait for response data in seconds (default: 15)'
+    )
+    parser.add_argument(
+        '--warmup',
+        type=int,
+        default=0,
+        help='HEAD requests opening connections before sending (default: 0; useful up to --connections)'
+    )
+    parser.add_argument(
+        '--client',
+        default='aiohttp',
+        choices=['aiohttp', 'httpx'],
+        help='HTTP client (default: aiohttp; httpx = HTTP/2, requires pip install "httpx[http2]")'
+    )
+    parser.add_argument(
+        '--loop',
+        default='auto',
+        choices=['auto', 'uvloop', 'asyncio'],
+        help='Event loop (default: auto = uvloop if installed, asyncio is easier to debug)'
+    )
+    parser.add_argument(
+        '--no-dedupe',
+        action='store_true',
+        help='Send every line, even repeated (advertising_id, developer_device_id) combinations'
+    )
     parser.add_argument(
         '--dry-run',
         action='store_true',
@@ -386,6 +980,8 @@ Usage examples:
     )
 
     args = parser.parse_args()
+    if args.max_retries < 0:
+        parser.error('--max-retries must be >= 0')
 
     # Validate SDK key
     if not args.sdk_key:
@@ -393,6 +989,18 @@ Usage examples:
         print("   Set TENJIN_SDK_KEY environment variable or use --sdk-key argument")
         sys.exit(1)
 
+    # Validate bundle ID
+    if not args.bundle_id:
+        print("❌ Error: Bundle ID is required.")
+        print("   Use --bundle-id argument")
+        sys.exit(1)
+
+    # Validate HTTP client
+    if args.client == 'httpx' and not HAS_HTTPX:
+        print("❌ Error: --client httpx requires httpx with HTTP/2 support.")
+        print('   Install it with: pip install "httpx[http2]"')
+        sys.exit(1)
+
     # Create importer
     importer = TenjinImporter(
         sdk_key=args.sdk_key,
@@ -400,6 +1008,14 @@ Usage examples:
         platform=args.platform,
         batch_size=args.batch_size,
         concurrency=args.concurrency,
+        delay=args.delay,
+        max_retries=args.max_retries,
+        timeout_total=args.timeout_total,
+        timeout_read=args.timeout_read,
+        dedupe=not args.no_dedupe,
+        connections=args.connections,
+        client=args.client,
+        warmup=args.warmup,
         log_file=args.log_file
     )
 
@@ -409,7 +1025,8 @@ Usage examples:
             csv_file=args.file,
             start_line=args.start_line,
             max_lines=args.max_lines,
-            dry_run=args.dry_run
+            dry_run=args.dry_run,
+            loop=args.loop
         )
     except FileNotFoundError:
         importer.logger.error(f"❌ Error: The file '{args.file}' does not exist.")
@@ -423,6 +1040,8 @@ Usage examples:
         import traceback
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        importer.close()
 
 
 if __name__ == '__main__':